@@ -1,18 +1,21 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.patches import Polygon
+import matplotlib.colors as mcolors
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
+from matplotlib.collections import LineCollection, PolyCollection
 import numpy as np
-from io import BytesIO
-import base64
+from io import BytesIO, TextIOWrapper
+import hashlib
+from functools import lru_cache, partial
+from importlib.util import find_spec
 
-# Try to import BioPython for GenBank parsing
-try:
-    from Bio import SeqIO
-    BIOPYTHON_AVAILABLE = True
-except ImportError:
-    BIOPYTHON_AVAILABLE = False
+# Check for BioPython without importing it; SeqIO is only imported when a GenBank
+# file is actually parsed, so startup and the other tabs don't pay for it
+BIOPYTHON_AVAILABLE = find_spec('Bio') is not None
+
+# Use the Rust-based calamine reader for Excel uploads when installed, openpyxl otherwise
+EXCEL_ENGINE = 'calamine' if find_spec('python_calamine') is not None else 'openpyxl'
 
 # Define pastel colors
 PASTEL_COLORS = [
@@ -23,8 +26,9 @@ PASTEL_COLORS = [
     'powderblue', 'pink'
 ]
 
-# Extended color palette for dropdowns (organized by category)
-ALL_COLORS = [
+# Extended color palette for dropdowns (organized by category); a tuple so the
+# same immutable options object is passed to the widgets on every rerun
+ALL_COLORS = (
     # Pastel colors
     'lightblue', 'lightcoral', 'lightgreen', 'lightyellow', 
     'lightpink', 'lightsalmon', 'lightcyan', 'lavender',
@@ -44,152 +48,210 @@ ALL_COLORS = [
     'seagreen', 'sienna', 'skyblue', 'slateblue',
     'springgreen', 'steelblue', 'tan', 'tomato',
     'turquoise', 'violet', 'yellowgreen'
-]
+)
+
+# R color names that have no direct matplotlib equivalent
+R_COLOR_MAP = {
+    'lightyellow2': 'lightyellow',
+    'lightblue2': 'lightblue',
+    'lightpink2': 'lightpink'
+}
 
+# Named colors matplotlib understands, precomputed for O(1) lookups
+KNOWN_COLORS = (frozenset(mcolors.CSS4_COLORS) | frozenset(mcolors.BASE_COLORS) |
+                frozenset(mcolors.TABLEAU_COLORS) | frozenset(mcolors.XKCD_COLORS))
+
+@lru_cache(maxsize=1024)
 def convert_r_color(color_name):
-    """Convert R color names to matplotlib equivalents"""
-    color_map = {
-        'lightyellow2': 'lightyellow',
-        'lightblue2': 'lightblue',
-        'lightpink2': 'lightpink'
-    }
-    return color_map.get(color_name, color_name)
+    """Convert R color names to matplotlib equivalents (cached per color name)"""
+    color_lower = str(color_name).strip().lower()
+    if color_lower in R_COLOR_MAP:
+        return R_COLOR_MAP[color_lower]
+    if color_lower in KNOWN_COLORS:
+        return color_lower
+    # R numbered variants (e.g. steelblue3) fall back to their base color; single
+    # letters are skipped so cycle colors like C0 are left alone
+    base_color = color_lower.rstrip('0123456789')
+    if len(base_color) > 1 and base_color != color_lower:
+        if base_color in R_COLOR_MAP:
+            return R_COLOR_MAP[base_color]
+        if base_color in KNOWN_COLORS:
+            return base_color
+    # Hex strings and other color specs are passed through for matplotlib to parse
+    return color_name
+
+@lru_cache(maxsize=1024)
+def color_to_rgba(color_name):
+    """Resolve a color name (including R names) to an RGBA tuple (cached per color name)"""
+    return mcolors.to_rgba(convert_r_color(color_name))
+
+# Column types for uploaded CSV/Excel element tables; coordinates are read as floats
+# so blank cells and fractional values can be reported before casting to int32
+ELEMENT_TABLE_DTYPES = {
+    'Element': 'str', 'Start': 'float64', 'End': 'float64',
+    'Color': 'str', 'Position': 'category'
+}
+COORDINATE_COLUMNS = ('Start', 'End')
 
-def parse_genbank_file(uploaded_file):
+# Columns of manually entered elements, stored in session state as one list per column
+MANUAL_COLUMNS = ('Element', 'Start', 'End', 'Color', 'Position', 'IsPromoter')
+
+# GenBank qualifiers used for the element name, in priority order
+NAME_QUALIFIERS = ('standard_name', 'label', 'gene', 'product')
+
+# GenBank qualifiers searched for "promoter" on regulatory features
+PROMOTER_QUALIFIERS = ('note', 'regulatory_class', 'standard_name', 'label')
+
+@st.cache_data(show_spinner=False)
+def parse_genbank_bytes(file_content):
     """
-    Parse a GenBank file and extract features for plasmid mapping
-    Returns a pandas DataFrame with columns: Element, Start, End, Color, Position, Strand, Note, IsPromoter
+    Parse raw GenBank file bytes into a DataFrame of features (without colors)
+    Cached per file content, so reruns and re-uploads skip the BioPython parse
+    Returns (DataFrame, plasmid_length); parse errors are raised, not cached
     """
-    if not BIOPYTHON_AVAILABLE:
-        st.error("BioPython is not installed. Please install it with: pip install biopython")
-        return None
+    from Bio import SeqIO
     
-    try:
-        # Convert Streamlit's UploadedFile to text mode for BioPython
-        from io import StringIO
+    # Decode lazily while BioPython reads, instead of materializing the whole text;
+    # BytesIO shares the bytes buffer rather than copying it
+    text_file = TextIOWrapper(BytesIO(file_content), encoding='utf-8')
+    
+    # Parse the GenBank file
+    record = SeqIO.read(text_file, "genbank")
+    plasmid_length = len(record.seq)
+    
+    # Collect features column by column so the DataFrame is built without per-row dicts
+    elements_data = {
+        'Element': [], 'Start': [], 'End': [],
+        'Position': [], 'Strand': [], 'Note': [], 'IsPromoter': []
+    }
+    
+    # Skip source features (GenBank feature keys are case-sensitive, so compare exactly)
+    features = (feature for feature in record.features if feature.type != 'source')
+    
+    for feature in features:
+        # Extract feature location
+        start = int(feature.location.start) + 1  # Convert to 1-based
+        end = int(feature.location.end)
         
-        # Read the file content and decode if necessary
-        file_content = uploaded_file.read()
-        if isinstance(file_content, bytes):
-            file_content = file_content.decode('utf-8')
+        # Get strand information (+1 = forward, -1 = reverse/complement)
+        strand = feature.location.strand if hasattr(feature.location, 'strand') else 1
         
-        # Create a StringIO object for BioPython
-        text_file = StringIO(file_content)
+        qualifiers = feature.qualifiers
+        feature_type = feature.type.lower()
         
-        # Parse the GenBank file
-        record = SeqIO.read(text_file, "genbank")
-        plasmid_length = len(record.seq)
+        # Extract feature name with priority order, falling back to feature type and position
+        name = next((qualifiers[key][0] for key in NAME_QUALIFIERS if key in qualifiers),
+                    f"{feature.type}_{start}_{end}")
         
-        elements_data = []
+        # Extract note qualifier
+        note = " ".join(qualifiers.get('note', ())).lower()
         
-        for feature in record.features:
-            # Skip source features
-            if feature.type.lower() == 'source':
-                continue
-            
-            # Extract feature location
-            start = int(feature.location.start) + 1  # Convert to 1-based
-            end = int(feature.location.end)
-            
-            # Get strand information (+1 = forward, -1 = reverse/complement)
-            strand = feature.location.strand if hasattr(feature.location, 'strand') else 1
-            
-            # Extract feature name with priority order
-            name = None
-            if 'standard_name' in feature.qualifiers:
-                name = feature.qualifiers['standard_name'][0]
-            elif 'label' in feature.qualifiers:
-                name = feature.qualifiers['label'][0]
-            elif 'gene' in feature.qualifiers:
-                name = feature.qualifiers['gene'][0]
-            elif 'product' in feature.qualifiers:
-                name = feature.qualifiers['product'][0]
-            else:
-                # Fallback to feature type and position
-                name = f"{feature.type}_{start}_{end}"
-            
-            # Extract note qualifier
-            note = ""
-            if 'note' in feature.qualifiers:
-                note = " ".join(feature.qualifiers['note']).lower()
-            
-            # Check if this is a promoter
-            is_promoter = (feature.type.lower() == 'regulatory' and 'promoter' in note)
-            
-            # Assign random pastel color
-            color = np.random.choice(PASTEL_COLORS)
-            
-            # Smart positioning based on strand direction:
-            # Forward strand (+1) = Up
-            # Reverse strand/complement (-1) = Down
-            # If strand info missing, use old logic (misc_feature = Down, others = Up)
-            if strand == -1:
-                position = "Down"
-            elif strand == 1:
-                position = "Up"
-            else:
-                # Fallback for features without strand info
-                position = "Down" if feature.type.lower() == 'misc_feature' else "Up"
-            
-            elements_data.append({
-                'Element': name,
-                'Start': start,
-                'End': end,
-                'Color': color,
-                'Position': position,
-                'Strand': strand,
-                'Note': note,
-                'IsPromoter': is_promoter
-            })
+        # Check if this is a promoter
+        is_promoter = (feature_type == 'regulatory' and
+                       any('promoter' in value.lower()
+                           for key in PROMOTER_QUALIFIERS if key in qualifiers
+                           for value in qualifiers[key]))
+        
+        # Smart positioning based on strand direction:
+        # Forward strand (+1) = Up
+        # Reverse strand/complement (-1) = Down
+        # If strand info missing, use old logic (misc_feature = Down, others = Up)
+        if strand == -1:
+            position = "Down"
+        elif strand == 1:
+            position = "Up"
+        else:
+            # Fallback for features without strand info
+            position = "Down" if feature_type == 'misc_feature' else "Up"
         
-        df = pd.DataFrame(elements_data)
-        return df, plasmid_length
+        elements_data['Element'].append(name)
+        elements_data['Start'].append(start)
+        elements_data['End'].append(end)
+        elements_data['Position'].append(position)
+        elements_data['Strand'].append(strand if strand is not None else 0)  # 0 = no strand info
+        elements_data['Note'].append(note)
+        elements_data['IsPromoter'].append(is_promoter)
+    
+    df = pd.DataFrame(elements_data).astype({
+        'Start': 'int32', 'End': 'int32', 'Strand': 'int8', 'IsPromoter': 'bool',
+        'Position': pd.CategoricalDtype(['Up', 'Down'])
+    })
+    return df, plasmid_length
+
+def parse_genbank_file(file_content):
+    """
+    Parse a GenBank file and extract features for plasmid mapping
+    Returns a pandas DataFrame with columns: Element, Start, End, Color, Position, Strand, Note, IsPromoter
+    """
+    if not BIOPYTHON_AVAILABLE:
+        st.error("BioPython is not installed. Please install it with: pip install biopython")
+        return None
     
+    try:
+        df, plasmid_length = parse_genbank_bytes(file_content)
     except Exception as e:
         st.error(f"Error parsing GenBank file: {str(e)}")
         return None
+    
+    # Assign random pastel colors outside the cache so every upload gets a fresh palette
+    rng = np.random.default_rng()
+    df.insert(3, 'Color', pd.Categorical(rng.choice(PASTEL_COLORS, size=len(df)),
+                                         categories=PASTEL_COLORS))
+    return df, plasmid_length
 
-def create_arrow_polygon(x_center, y_center, width, height, direction='right'):
+@st.cache_data(show_spinner=False)
+def parse_element_table(file_content, file_name):
     """
-    Create an arrow-shaped polygon for promoters
-    direction: 'right' for forward strand, 'left' for reverse strand
+    Read an uploaded CSV or Excel element table from its raw bytes
+    Cached per file content, so reruns don't re-read the same upload
     """
-    if direction == 'right':
-        # Arrow pointing right
-        points = [
-            [x_center - width/2, y_center - height/2],  # Bottom left
-            [x_center + width/3, y_center - height/2],  # Bottom middle
-            [x_center + width/3, y_center - height/1.5], # Bottom arrow point
-            [x_center + width/2, y_center],              # Right tip
-            [x_center + width/3, y_center + height/1.5], # Top arrow point
-            [x_center + width/3, y_center + height/2],   # Top middle
-            [x_center - width/2, y_center + height/2],   # Top left
-        ]
-    else:  # left
-        # Arrow pointing left
-        points = [
-            [x_center + width/2, y_center - height/2],  # Bottom right
-            [x_center - width/3, y_center - height/2],  # Bottom middle
-            [x_center - width/3, y_center - height/1.5], # Bottom arrow point
-            [x_center - width/2, y_center],              # Left tip
-            [x_center - width/3, y_center + height/1.5], # Top arrow point
-            [x_center - width/3, y_center + height/2],   # Top middle
-            [x_center + width/2, y_center + height/2],   # Top right
-        ]
-    
-    return Polygon(points, closed=True)
+    # Explicit column types skip dtype inference; pyarrow (a Streamlit dependency)
+    # parses CSV much faster than the default C engine
+    if file_name.endswith('.csv'):
+        df = pd.read_csv(BytesIO(file_content), dtype=ELEMENT_TABLE_DTYPES, engine='pyarrow')
+    else:
+        df = pd.read_excel(BytesIO(file_content), dtype=ELEMENT_TABLE_DTYPES, engine=EXCEL_ENGINE)
+    
+    # Reject missing or non-integer coordinates instead of failing the cast or truncating
+    for column in COORDINATE_COLUMNS:
+        if column not in df.columns:
+            continue
+        invalid = df[column].isna() | (df[column] % 1 != 0)
+        if invalid.any():
+            rows = ', '.join(str(row + 2) for row in df.index[invalid][:5])  # +2: 1-based, after header
+            raise ValueError(f"'{column}' must be a whole number in every row (check row {rows})")
+        df[column] = df[column].astype('int32')
+    return df
+
+# Arrow outline for promoters as multiples of the element width (x, measured from the
+# center for a right-pointing arrow) and box height (y, from the box center):
+# bottom left, bottom middle, bottom arrow point, tip, top arrow point, top middle, top left
+ARROW_X_FRACTIONS = np.array([-1/2, 1/3, 1/3, 1/2, 1/3, 1/3, -1/2])
+ARROW_Y_FRACTIONS = np.array([-1/2, -1/2, -1/1.5, 0, 1/1.5, 1/2, 1/2])
+
+def create_arrow_vertices(x_centers, y_centers, widths, height, directions):
+    """
+    Create arrow-shaped polygons for promoters, all at once
+    directions: +1 for arrows pointing right (forward strand), -1 for left (reverse strand)
+    Returns an (N, 7, 2) array of vertices
+    """
+    xs = x_centers[:, None] + (directions * widths)[:, None] * ARROW_X_FRACTIONS
+    ys = y_centers[:, None] + height * ARROW_Y_FRACTIONS
+    return np.stack([xs, np.broadcast_to(ys, xs.shape)], axis=-1)
 
 def create_plasmid_map(df, plasmid_length, label_font=11, show_positions=False, 
-                       text_orientation='horizontal', region_start=None, region_end=None):
-    """Create plasmid map visualization with arrow-shaped promoters"""
+                       text_orientation='horizontal', region_start=None, region_end=None,
+                       fig=None):
+    """
+    Create plasmid map visualization with arrow-shaped promoters
+    If fig is given it is cleared and drawn on instead of creating a new figure
+    """
     
-    # Filter for region if specified
+    # Filter for region if specified (keep every element overlapping the region)
     if region_start is not None and region_end is not None:
-        df = df[
-            ((df['Start'] >= region_start) & (df['Start'] <= region_end)) |
-            ((df['End'] >= region_start) & (df['End'] <= region_end)) |
-            ((df['Start'] <= region_start) & (df['End'] >= region_end))
-        ].copy()
+        in_region = ~((df['End'].to_numpy() < region_start) |
+                      (df['Start'].to_numpy() > region_end))
+        df = df.iloc[in_region].copy()
         
         if df.empty:
             st.warning("No elements found in the specified region.")
@@ -203,7 +265,13 @@ def create_plasmid_map(df, plasmid_length, label_font=11, show_positions=False,
         plot_start = 0
         plot_end = plasmid_length
     
-    fig, ax = plt.subplots(figsize=(14, 4))
+    # Figures are built with the OO API so pyplot (and a GUI backend) is never loaded
+    if fig is None:
+        fig = Figure(figsize=(14, 4))
+    else:
+        # clf() also resets the subplot margins left by the previous tight_layout
+        fig.clf()
+    ax = fig.add_subplot()
     
     # Draw the plasmid line
     ax.plot([plot_start, plot_end], [0, 0], 'k-', linewidth=3)
@@ -214,123 +282,115 @@ def create_plasmid_map(df, plasmid_length, label_font=11, show_positions=False,
     
     # For horizontal text, create staggered levels to avoid overlap
     if text_orientation == 'horizontal':
-        # Sort elements by position to assign levels
-        df_sorted = df.sort_values('Start').reset_index(drop=True)
-        element_levels = {}
+        # Cycle through levels in order of start position; ranks are per row, so
+        # elements sharing a name keep their own level
         num_levels = 3  # Use 3 different height levels
+        order = np.argsort(df['Start'].to_numpy(), kind='stable')
+        ranks = np.empty(len(order), dtype=int)
+        ranks[order] = np.arange(len(order))
+        levels = ranks % num_levels
         
-        for idx, row in df_sorted.iterrows():
-            element = row['Element']
-            position = row['Position']
-            # Cycle through levels based on index
-            level = idx % num_levels
-            element_levels[element] = level
-    
-    for _, row in df.iterrows():
-        element = row['Element']
-        start = row['Start']
-        end = row['End']
-        color = convert_r_color(row['Color'])
-        position = row['Position']
-        is_promoter = row.get('IsPromoter', False)
-        strand = row.get('Strand', 1)
-        
-        # Calculate center and width
-        center = (start + end) / 2
-        width = end - start
-        
-        # Calculate element size for label
-        element_size = end - start + 1
-        size_label = f" ({element_size} bp)" if show_positions else ""
-        
-        # Determine y position and line height
-        if text_orientation == 'horizontal':
-            # Use staggered levels for horizontal text
-            level = element_levels.get(element, 0)
-            level_multiplier = 1 + (level * 0.6)  # Stagger at 1x, 1.6x, 2.2x height (more spacing!)
-            
-            if position == "Up":
-                box_y = box_height / 2
-                line_end_y = box_height + (text_distance * level_multiplier)
-                text_y = line_end_y + text_gap
-            else:
-                box_y = -box_height / 2
-                line_end_y = -box_height - (text_distance * level_multiplier)
-                text_y = line_end_y - text_gap
-        else:
-            # Vertical text - no staggering needed
-            if position == "Up":
-                box_y = box_height / 2
-                line_end_y = box_height + text_distance
-                text_y = line_end_y + text_gap
-            else:
-                box_y = -box_height / 2
-                line_end_y = -box_height - text_distance
-                text_y = line_end_y - text_gap
-        
-        # Draw arrow for promoters, rectangle for others
-        if is_promoter:
-            # Draw arrow shape
-            arrow_direction = 'right' if strand >= 0 else 'left'
-            arrow = create_arrow_polygon(center, box_y, width, box_height, arrow_direction)
-            arrow_patch = patches.Polygon(arrow.get_xy(), closed=True, 
-                                         edgecolor='black', facecolor=color, 
-                                         linewidth=1.5, zorder=3)
-            ax.add_patch(arrow_patch)
-        else:
-            # Draw rectangle
-            rect = patches.Rectangle((start, box_y - box_height/2), width, box_height,
-                                    linewidth=1.5, edgecolor='black', facecolor=color)
-            ax.add_patch(rect)
+        # Stagger at 1x, 1.6x, 2.2x height (more spacing!)
+        level_multipliers = 1 + (levels * 0.6)
+    else:
+        # Vertical text - no staggering needed
+        level_multipliers = np.ones(len(df))
+    
+    # Compute the geometry of every element at once
+    elements = df['Element'].to_numpy()
+    starts = df['Start'].to_numpy()
+    ends = df['End'].to_numpy()
+    # Fill colors as an (N, 4) RGBA array, each distinct name parsed only once
+    face_rgba = np.array([color_to_rgba(color) for color in df['Color']], dtype=float).reshape(-1, 4)
+    positions = df['Position'].to_numpy()
+    is_promoters = (df['IsPromoter'].to_numpy(dtype=bool) if 'IsPromoter' in df
+                    else np.zeros(len(df), dtype=bool))
+    strands = (df['Strand'].to_numpy(dtype=float) if 'Strand' in df
+               else np.ones(len(df)))
+    
+    centers = (starts + ends) / 2
+    widths = ends - starts
+    element_sizes = ends - starts + 1
+    
+    is_up = positions == "Up"
+    box_ys = np.where(is_up, box_height / 2, -box_height / 2)
+    line_end_ys = np.where(is_up,
+                           box_height + text_distance * level_multipliers,
+                           -box_height - text_distance * level_multipliers)
+    text_ys = np.where(is_up, line_end_ys + text_gap, line_end_ys - text_gap)
+    
+    # Leader lines connecting each box to its text (stopping before the text)
+    leader_segments = np.stack([np.column_stack([centers, box_ys]),
+                                np.column_stack([centers, line_end_ys])], axis=1)
+    
+    # Rectangles for regular elements and arrows for promoters, each drawn as a
+    # single collection below
+    is_box = ~is_promoters
+    box_x0, box_x1 = starts[is_box], ends[is_box]
+    box_y0 = box_ys[is_box] - box_height / 2
+    box_y1 = box_y0 + box_height
+    rect_verts = np.stack([np.column_stack([box_x0, box_y0]), np.column_stack([box_x1, box_y0]),
+                           np.column_stack([box_x1, box_y1]), np.column_stack([box_x0, box_y1])],
+                          axis=1)
+    rect_colors = face_rgba[is_box]
+    
+    arrow_directions = np.where(strands[is_promoters] >= 0, 1, -1)
+    promoter_verts = create_arrow_vertices(centers[is_promoters], box_ys[is_promoters],
+                                           widths[is_promoters], box_height, arrow_directions)
+    promoter_colors = face_rgba[is_promoters]
+    
+    # Add element names with size in brackets (if enabled); label positions are
+    # precomputed and every label shares one font definition
+    label_font_props = FontProperties(size=label_font)
+    name_lengths = df['Element'].astype(str).str.len().to_numpy()
+    
+    if text_orientation == 'vertical':
+        # For vertical text (rotated 90°), anchored on the side facing away from the line;
+        # sizes continue in grey after the element name
+        h_aligns = np.where(is_up, 'left', 'right')
+        size_offsets = name_lengths * label_font * 0.7 + np.where(is_up, 15, 8)
+        size_ys = np.where(is_up, text_ys + size_offsets, text_ys - size_offsets)
         
-        # Draw vertical line connecting box to text (now stops before text)
-        ax.plot([center, center], [box_y, line_end_y], 'k-', linewidth=1.5)
+        for element, size, center, text_y, size_y, ha in zip(elements, element_sizes, centers,
+                                                             text_ys, size_ys, h_aligns):
+            ax.text(center, text_y, element, ha=ha, va='center',
+                   fontproperties=label_font_props, rotation=90, rotation_mode='anchor',
+                   color='black')
+            if show_positions:
+                ax.text(center, size_y, f" ({size} bp)", ha=ha, va='center',
+                       fontproperties=label_font_props, rotation=90, rotation_mode='anchor',
+                       color='grey')
+    else:
+        # Horizontal text: element name in black, centered, and size in grey using an
+        # offset in points (pixels) from the element name position
+        v_aligns = np.where(is_up, 'bottom', 'top')
+        size_offsets = name_lengths * label_font * 0.3 + 10
         
-        # Add element name with size in brackets (if enabled)
-        if text_orientation == 'vertical':
-            # For vertical text (rotated 90°)
-            if position == "Up":
-                # Draw element name
-                ax.text(center, text_y, element, ha='left', va='center',
-                       fontsize=label_font, rotation=90, rotation_mode='anchor',
-                       color='black')
-                # Add size if enabled
-                if show_positions:
-                    offset_y = len(element) * label_font * 0.7 + 15
-                    ax.text(center, text_y + offset_y, size_label, ha='left', va='center',
-                           fontsize=label_font, rotation=90, rotation_mode='anchor',
-                           color='grey')
-            else:
-                # Draw element name
-                ax.text(center, text_y, element, ha='right', va='center',
-                       fontsize=label_font, rotation=90, rotation_mode='anchor',
-                       color='black')
-                # Add size if enabled
-                if show_positions:
-                    offset_y = len(element) * label_font * 0.7 + 8
-                    ax.text(center, text_y - offset_y, size_label, ha='right', va='center',
-                           fontsize=label_font, rotation=90, rotation_mode='anchor',
-                           color='grey')
-        else:
-            # Horizontal text
-            va_align = 'bottom' if position == "Up" else 'top'
-            
+        for element, size, center, text_y, va, offset in zip(elements, element_sizes, centers,
+                                                             text_ys, v_aligns, size_offsets):
+            ax.text(center, text_y, element, ha='center', va=va,
+                   fontproperties=label_font_props, color='black')
             if show_positions:
-                # Draw element name in black, centered
-                ax.text(center, text_y, element, ha='center', va=va_align,
-                       fontsize=label_font, color='black')
-                
-                # Draw size in grey using offset from the element name position
-                # Use textcoords='offset points' for pixel-based positioning
-                ax.annotate(size_label, xy=(center, text_y), 
-                           xytext=(len(element)*label_font*0.3 + 10, 0),  # Offset in points (pixels)
-                           textcoords='offset points',
-                           ha='left', va=va_align,
-                           fontsize=label_font, color='grey')
-            else:
-                # Just element name, no size
-                ax.text(center, text_y, element, ha='center', va=va_align,
-                       fontsize=label_font, color='black')
+                ax.annotate(f" ({size} bp)", xy=(center, text_y), xytext=(offset, 0),
+                           textcoords='offset points', ha='left', va=va,
+                           fontproperties=label_font_props, color='grey')
+    
+    # Draw boxes and promoter arrows as collections instead of one patch per element
+    if len(rect_verts):
+        boxes = PolyCollection(rect_verts, closed=True, facecolors=rect_colors,
+                               edgecolors='black', linewidths=1.5, zorder=1)
+        ax.add_collection(boxes)
+    if len(promoter_verts):
+        promoters = PolyCollection(promoter_verts, closed=True, facecolors=promoter_colors,
+                                   edgecolors='black', linewidths=1.5, zorder=3)
+        ax.add_collection(promoters)
+    
+    # Draw all leader lines in a single artist instead of one Line2D per element
+    if len(leader_segments):
+        leaders = LineCollection(leader_segments,
+                                 colors='black', linewidths=1.5, zorder=2,
+                                 capstyle='projecting')
+        ax.add_collection(leaders)
     
     # Set axis properties - adjust y limits for staggered text
     ax.set_xlim(plot_start - 500, plot_end + 500)
@@ -342,21 +402,132 @@ def create_plasmid_map(df, plasmid_length, label_font=11, show_positions=False,
     ax.set_ylim(-y_max, y_max)
     ax.axis('off')
     
-    plt.tight_layout()
+    fig.tight_layout()
     return fig
 
-def fig_to_bytes(fig, format='png', dpi=500):
-    """Convert matplotlib figure to bytes with specified DPI"""
+# Vector formats are resolution independent, so no DPI is passed when saving them
+VECTOR_FORMATS = ('pdf', 'svg')
+
+# The preview is only shown in the browser, so it is rendered at screen resolution;
+# downloads keep their full print resolution
+PREVIEW_DPI = 100
+
+# Without an explicit DPI, raster output is sized to stay within this many pixels
+MAX_RASTER_PIXELS = 4_000_000
+MAX_DPI = 500
+
+# Resolutions offered for the PNG download; None picks the DPI from MAX_RASTER_PIXELS
+PNG_DPI_OPTIONS = (None, 150, 300, MAX_DPI)
+
+# zlib level 1 instead of Pillow's default 6: PNGs come out about 10% larger but
+# encode noticeably faster, which dominates the 500 DPI download
+PNG_SAVE_OPTIONS = {'compress_level': 1}
+
+def fig_to_bytes(fig, format='png', dpi=None, max_pixels=MAX_RASTER_PIXELS):
+    """
+    Convert matplotlib figure to bytes (DPI applies to raster formats only)
+    If dpi is None it is derived from the figure size so the image fits in max_pixels
+    """
     buf = BytesIO()
-    fig.savefig(buf, format=format, dpi=dpi, bbox_inches='tight')
+    if format in VECTOR_FORMATS:
+        fig.savefig(buf, format=format, bbox_inches='tight')
+    else:
+        if dpi is None:
+            width, height = fig.get_size_inches()
+            dpi = min(MAX_DPI, int((max_pixels / (width * height)) ** 0.5))
+        pil_kwargs = PNG_SAVE_OPTIONS if format == 'png' else None
+        fig.savefig(buf, format=format, dpi=dpi, bbox_inches='tight', pil_kwargs=pil_kwargs)
     buf.seek(0)
     return buf
 
-def get_download_link(buf, filename, file_label):
-    """Generate a download link for a file"""
-    b64 = base64.b64encode(buf.read()).decode()
-    href = f'<a href="data:file/txt;base64,{b64}" download="{filename}">{file_label}</a>'
-    return href
+def get_session_figure():
+    """Return this session's map Figure, reused by every render to avoid building new figures"""
+    if 'map_fig' not in st.session_state:
+        # Figure is not registered with pyplot, so it is freed together with the session
+        st.session_state.map_fig = Figure(figsize=(14, 4))
+    return st.session_state.map_fig
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def render_plasmid_map(df, plasmid_length, label_font=11, show_positions=False,
+                       text_orientation='horizontal', region_start=None, region_end=None):
+    """
+    Render the on-screen preview of the plasmid map
+    Returns PNG bytes, or None if there is nothing to draw. Cached so regenerating an
+    unchanged map is a lookup.
+    """
+    fig = create_plasmid_map(df, plasmid_length, label_font, show_positions,
+                             text_orientation, region_start, region_end,
+                             fig=get_session_figure())
+    if fig is None:
+        return None
+    return fig_to_bytes(fig, 'png', dpi=PREVIEW_DPI).getvalue()
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def export_plasmid_map(df, plasmid_length, label_font=11, show_positions=False,
+                       text_orientation='horizontal', region_start=None, region_end=None,
+                       format='png', dpi=MAX_DPI):
+    """
+    Render the plasmid map in a download format and return the file bytes
+    Called lazily by the download buttons, so only formats the user asks for are encoded.
+    """
+    # Download callables run outside the script thread, so draw on a private figure
+    # instead of the session one
+    fig = create_plasmid_map(df, plasmid_length, label_font, show_positions,
+                             text_orientation, region_start, region_end,
+                             fig=Figure(figsize=(14, 4)))
+    if fig is None:
+        return b''
+    return fig_to_bytes(fig, format, dpi=dpi).getvalue()
+
+def format_png_dpi(dpi):
+    """Label a PNG resolution option for the sidebar and download button"""
+    return "Auto DPI" if dpi is None else f"{dpi} DPI"
+
+@st.fragment
+def show_map_generator(df, plasmid_length, label_font, show_positions, text_orientation,
+                       region_start=None, region_end=None, png_dpi=MAX_DPI, key='generate'):
+    """
+    Show the Generate button, map preview and download options for one tab
+    Runs as a fragment, so clicking Generate reruns only this block instead of the whole app.
+    """
+    if not st.button("🎨 Generate Plasmid Map", type="primary", key=key):
+        return
+    if len(df) == 0:
+        st.warning("⚠️ No elements selected! Please enable at least one element.")
+        return
+    
+    # Fragment reruns skip the calling tab's error handling, so report render errors here
+    try:
+        with st.spinner("Generating plasmid map..."):
+            preview = render_plasmid_map(df, plasmid_length, label_font, show_positions,
+                                         text_orientation, region_start, region_end)
+    except Exception as e:
+        st.error(f"Error generating plasmid map: {str(e)}")
+        return
+    if not preview:
+        return
+    st.image(preview, use_container_width=True)
+    
+    # Download options
+    st.markdown("### 💾 Download Options")
+    download_formats = [
+        ('pdf', "📄 Download PDF", "application/pdf", None),
+        ('svg', "🎨 Download SVG", "image/svg+xml", None),
+        ('png', f"🖼️ Download PNG ({format_png_dpi(png_dpi)})", "image/png", png_dpi),
+    ]
+    columns = st.columns(len(download_formats))
+    for column, (file_format, label, mime, dpi) in zip(columns, download_formats):
+        with column:
+            # Each file is only rendered when its button is clicked
+            st.download_button(
+                label=label,
+                data=partial(export_plasmid_map, df, plasmid_length, label_font, show_positions,
+                             text_orientation, region_start, region_end,
+                             format=file_format, dpi=dpi),
+                file_name=f"plasmid_map.{file_format}",
+                mime=mime,
+                on_click="ignore"
+            )
 
 # Streamlit app
 st.set_page_config(page_title="Plasmid Map Generator", layout="wide")
@@ -370,6 +541,9 @@ text_orientation = st.sidebar.radio("Element Name Orientation",
                                     options=['horizontal', 'vertical'],
                                     index=0)
 show_positions = st.sidebar.checkbox("Show Element Sizes (in brackets)", value=False)
+png_dpi = st.sidebar.selectbox("PNG Download Resolution", PNG_DPI_OPTIONS,
+                               index=PNG_DPI_OPTIONS.index(MAX_DPI), format_func=format_png_dpi,
+                               help="Auto picks the highest DPI that keeps the image within about 4 megapixels")
 
 st.sidebar.markdown("---")
 st.sidebar.markdown("### 🎨 Color Palette Reference")
@@ -393,14 +567,14 @@ with tab1:
     **Features:**
     - ✅ Automatic feature parsing
     - ✅ Arrow-shaped promoter boxes (pointing based on strand direction)
-    - ✅ Individual color customization with preview
+    - ✅ Per-element color and position customization in one table
     - ✅ Show/hide specific elements (with Select/Deselect All)
     - ✅ Region selection
     - ✅ Editable element labels
     - ✅ Element sizes in brackets (grey text)
     - ✅ Staggered horizontal labels (no overlap!)
     - ✅ Smart positioning (strand-based)
-    - ✅ High resolution output (500 DPI)
+    - ✅ High resolution PNG output (up to 500 DPI, set in the sidebar)
     """)
     
     if not BIOPYTHON_AVAILABLE:
@@ -417,35 +591,50 @@ with tab1:
         
         if uploaded_gb is not None:
             # Parse GenBank file
-            result = parse_genbank_file(uploaded_gb)
+            file_content = uploaded_gb.getvalue()
+            result = parse_genbank_file(file_content)
             
             if result is not None:
                 df, plasmid_length = result
                 st.success(f"✅ Successfully parsed {len(df)} features from {uploaded_gb.name} ({plasmid_length} bp)")
                 
-                # Store in session state
-                st.session_state.gb_data = df
-                st.session_state.plasmid_length = plasmid_length
-                
-                # Initialize color and position preferences if not exists
-                if 'color_prefs' not in st.session_state:
+                # Store in session state and reset preferences only when a different file is
+                # uploaded; the file hash is an O(1) freshness check on every rerun
+                file_hash = hashlib.sha1(file_content).digest()
+                if st.session_state.get('gb_hash') != file_hash:
+                    st.session_state.gb_hash = file_hash
+                    st.session_state.gb_data = df
+                    st.session_state.plasmid_length = plasmid_length
                     st.session_state.color_prefs = {}
-                if 'position_prefs' not in st.session_state:
                     st.session_state.position_prefs = {}
-                if 'enabled_elements' not in st.session_state:
                     st.session_state.enabled_elements = {}
-                if 'edited_labels' not in st.session_state:
                     st.session_state.edited_labels = {}
-                
-                # Initialize enabled state for all elements using unique keys
-                for idx, row in df.iterrows():
-                    element = row['Element']
-                    unique_key = f"{idx}_{element}"
-                    if unique_key not in st.session_state.enabled_elements:
+                    
+                    # Initialize every preference for all elements using unique keys
+                    for idx, element, color, position in zip(df.index, df['Element'],
+                                                             df['Color'], df['Position']):
+                        unique_key = f"{idx}_{element}"
                         st.session_state.enabled_elements[unique_key] = True
-                    # Initialize edited labels with original element name
-                    if unique_key not in st.session_state.edited_labels:
+                        # Initialize edited labels with original element name
                         st.session_state.edited_labels[unique_key] = element
+                        st.session_state.color_prefs[unique_key] = color
+                        st.session_state.position_prefs[unique_key] = position
+                    
+                    # The element table passed to the editor stays fixed while the user edits
+                    # (the editor's own state holds the edits); changing its data would give
+                    # the editor a new identity and drop pending edits. A new editor version
+                    # keeps edits made to the previous file from being replayed onto this one.
+                    strand_info = pd.Series(np.where(df['Strand'] >= 0, "forward", "reverse"),
+                                            index=df.index)
+                    st.session_state.element_table = pd.DataFrame({
+                        'Original Name': df['Element'],
+                        'Details': strand_info.where(~df['IsPromoter'], "Promoter, " + strand_info),
+                        'Display Label': df['Element'],
+                        'Color': df['Color'].astype(str),
+                        'Position': df['Position'].astype(str),
+                        'Show': True
+                    })
+                    st.session_state.editor_version = st.session_state.get('editor_version', 0) + 1
                 
                 # Region selection
                 st.markdown("---")
@@ -470,9 +659,8 @@ with tab1:
                                                     value=min(1000, plasmid_length),
                                                     key='region_end_gb')
                 
-                # Initialize checkbox refresh counter if not exists
-                if 'checkbox_refresh' not in st.session_state:
-                    st.session_state.checkbox_refresh = 0
+                # Unique key per element using both index and element name to avoid duplicates
+                unique_keys = df.index.to_series().astype(str) + '_' + df['Element'].astype(str)
                 
                 # Customization section
                 st.markdown("---")
@@ -481,143 +669,54 @@ with tab1:
                 # Add Select All / Deselect All buttons
                 col_btn1, col_btn2, col_btn3 = st.columns([1, 1, 4])
                 with col_btn1:
-                    if st.button("✅ Select All", use_container_width=True, key="select_all_btn"):
-                        for idx, row in df.iterrows():
-                            element = row['Element']
-                            unique_key = f"{idx}_{element}"
-                            st.session_state.enabled_elements[unique_key] = True
-                        st.session_state.checkbox_refresh += 1  # Force checkbox recreation
+                    select_all = st.button("✅ Select All", use_container_width=True, key="select_all_btn")
                 
                 with col_btn2:
-                    if st.button("❌ Deselect All", use_container_width=True, key="deselect_all_btn"):
-                        for idx, row in df.iterrows():
-                            element = row['Element']
-                            unique_key = f"{idx}_{element}"
-                            st.session_state.enabled_elements[unique_key] = False
-                        st.session_state.checkbox_refresh += 1  # Force checkbox recreation
+                    deselect_all = st.button("❌ Deselect All", use_container_width=True, key="deselect_all_btn")
+                
+                if select_all or deselect_all:
+                    # Restart the editor from the current preferences with every Show box set
+                    st.session_state.element_table = st.session_state.element_table.assign(**{
+                        'Display Label': unique_keys.map(st.session_state.edited_labels),
+                        'Color': unique_keys.map(st.session_state.color_prefs),
+                        'Position': unique_keys.map(st.session_state.position_prefs),
+                        'Show': select_all
+                    })
+                    st.session_state.editor_version += 1
                 
                 with st.expander("Customize individual element colors, positions, and visibility"):
-                    # Initialize edited labels dict if not exists
-                    if 'edited_labels' not in st.session_state:
-                        st.session_state.edited_labels = {}
-                    
-                    # Add column headers
-                    header_cols = st.columns([3, 2, 2, 2, 1])
-                    with header_cols[0]:
-                        st.markdown("**Original Name**")
-                    with header_cols[1]:
-                        st.markdown("**Display Label**")
-                    with header_cols[2]:
-                        st.markdown("**Color**")
-                    with header_cols[3]:
-                        st.markdown("**Position**")
-                    with header_cols[4]:
-                        st.markdown("**Show**")
-                    
-                    st.markdown("---")
-                    
-                    for idx, row in df.iterrows():
-                        element = row['Element']
-                        is_promoter = row.get('IsPromoter', False)
-                        strand = row.get('Strand', 1)
-                        
-                        # Create unique key using both index and element name to avoid duplicates
-                        unique_key = f"{idx}_{element}"
-                        
-                        # Create columns for each element's controls
-                        col1, col2, col3, col4, col5 = st.columns([3, 2, 2, 2, 1])
-                        
-                        with col1:
-                            # Show element name with promoter indicator and strand info
-                            if is_promoter:
-                                arrow_symbol = "→" if strand >= 0 else "←"
-                                strand_info = "forward" if strand >= 0 else "reverse"
-                                st.markdown(f"**{element}** {arrow_symbol} (Promoter, {strand_info})")
-                            else:
-                                strand_info = "forward" if strand >= 0 else "reverse"
-                                st.markdown(f"**{element}** ({strand_info})")
-                        
-                        with col2:
-                            # Editable label
-                            current_label = st.session_state.edited_labels.get(unique_key, element)
-                            new_label = st.text_input(
-                                "Label",
-                                value=current_label,
-                                key=f"label_{unique_key}",
-                                label_visibility="collapsed",
-                                placeholder="Edit label..."
-                            )
-                            st.session_state.edited_labels[unique_key] = new_label
-                        
-                        with col3:
-                            # Color selector with preview
-                            current_color = st.session_state.color_prefs.get(unique_key, row['Color'])
-                            
-                            new_color = st.selectbox(
-                                f"Color",
-                                options=ALL_COLORS,
-                                index=ALL_COLORS.index(current_color) if current_color in ALL_COLORS else 0,
-                                key=f"color_{unique_key}",
-                                label_visibility="collapsed"
-                            )
-                            st.session_state.color_prefs[unique_key] = new_color
-                            
-                            # Show color preview with actual color styling
-                            st.markdown(
-                                f'<div style="background-color: {new_color}; width: 100%; height: 25px; '
-                                f'border: 2px solid #333; border-radius: 4px; margin-top: 5px;"></div>', 
-                                unsafe_allow_html=True
-                            )
-                        
-                        with col4:
-                            # Position selector
-                            current_position = st.session_state.position_prefs.get(unique_key, row['Position'])
-                            new_position = st.selectbox(
-                                f"Position",
-                                options=["Up", "Down"],
-                                index=0 if current_position == "Up" else 1,
-                                key=f"position_{unique_key}",
-                                label_visibility="collapsed"
-                            )
-                            st.session_state.position_prefs[unique_key] = new_position
-                        
-                        with col5:
-                            # Enable/disable checkbox with refresh counter in key
-                            current_enabled = st.session_state.enabled_elements.get(unique_key, True)
-                            enabled = st.checkbox(
-                                "Show",
-                                value=current_enabled,
-                                key=f"enabled_{unique_key}_{st.session_state.checkbox_refresh}"
-                            )
-                            st.session_state.enabled_elements[unique_key] = enabled
+                    # Edit all elements in one table instead of creating a row of
+                    # widgets per element on every rerun; the form batches cell edits so
+                    # each one does not rerun the app until Apply Changes is clicked
+                    with st.form("customize_elements_form"):
+                        edited_df = st.data_editor(
+                            st.session_state.element_table,
+                            column_config={
+                                'Color': st.column_config.SelectboxColumn(options=ALL_COLORS, required=True),
+                                'Position': st.column_config.SelectboxColumn(options=["Up", "Down"], required=True),
+                                'Show': st.column_config.CheckboxColumn()
+                            },
+                            disabled=['Original Name', 'Details'],
+                            use_container_width=True,
+                            key=f"element_editor_{st.session_state.editor_version}"
+                        )
+                        st.form_submit_button("✅ Apply Changes")
+                    st.session_state.edited_labels.update(zip(unique_keys, edited_df['Display Label']))
+                    st.session_state.color_prefs.update(zip(unique_keys, edited_df['Color']))
+                    st.session_state.position_prefs.update(zip(unique_keys, edited_df['Position']))
+                    st.session_state.enabled_elements.update(zip(unique_keys, edited_df['Show']))
                 
-                # Apply customizations to dataframe
+                # Apply customizations to dataframe, one column at a time
                 df_display = df.copy()
-                for idx, row in df_display.iterrows():
-                    element = row['Element']
-                    unique_key = f"{idx}_{element}"
-                    
-                    # Apply edited labels
-                    if unique_key in st.session_state.edited_labels:
-                        df_display.loc[idx, 'Element'] = st.session_state.edited_labels[unique_key]
-                    
-                    # Apply color preferences
-                    if unique_key in st.session_state.color_prefs:
-                        df_display.loc[idx, 'Color'] = st.session_state.color_prefs[unique_key]
-                    
-                    # Apply position preferences
-                    if unique_key in st.session_state.position_prefs:
-                        df_display.loc[idx, 'Position'] = st.session_state.position_prefs[unique_key]
                 
-                # Filter out disabled elements
-                enabled_indices = []
-                for idx, row in df_display.iterrows():
-                    element = row['Element']
-                    unique_key = f"{idx}_{element}"
-                    if st.session_state.enabled_elements.get(unique_key, True):
-                        enabled_indices.append(idx)
+                # Apply edited labels, color preferences and position preferences
+                df_display['Element'] = unique_keys.map(st.session_state.edited_labels).fillna(df_display['Element'])
+                df_display['Color'] = unique_keys.map(st.session_state.color_prefs).fillna(df_display['Color'])
+                df_display['Position'] = unique_keys.map(st.session_state.position_prefs).fillna(df_display['Position'])
                 
-                df_display = df_display.loc[enabled_indices]
+                # Filter out disabled elements
+                enabled = unique_keys.map(st.session_state.enabled_elements).fillna(True).astype(bool)
+                df_display = df_display[enabled]
                 
                 # Show feature table
                 st.markdown("---")
@@ -631,50 +730,9 @@ with tab1:
                 
                 # Generate button
                 st.markdown("---")
-                if st.button("🎨 Generate Plasmid Map", type="primary", key='generate_gb'):
-                    if len(df_display) == 0:
-                        st.warning("⚠️ No elements selected! Please enable at least one element.")
-                    else:
-                        with st.spinner("Generating plasmid map..."):
-                            fig = create_plasmid_map(df_display, plasmid_length, label_font, 
-                                                   show_positions, text_orientation,
-                                                   region_start, region_end)
-                            
-                            if fig:
-                                st.pyplot(fig)
-                                
-                                # Download options
-                                st.markdown("### 💾 Download Options")
-                                col1, col2, col3 = st.columns(3)
-                                
-                                with col1:
-                                    pdf_buf = fig_to_bytes(fig, 'pdf', dpi=500)
-                                    st.download_button(
-                                        label="📄 Download PDF",
-                                        data=pdf_buf,
-                                        file_name="plasmid_map.pdf",
-                                        mime="application/pdf"
-                                    )
-                                
-                                with col2:
-                                    svg_buf = fig_to_bytes(fig, 'svg', dpi=500)
-                                    st.download_button(
-                                        label="🎨 Download SVG",
-                                        data=svg_buf,
-                                        file_name="plasmid_map.svg",
-                                        mime="image/svg+xml"
-                                    )
-                                
-                                with col3:
-                                    png_buf = fig_to_bytes(fig, 'png', dpi=500)
-                                    st.download_button(
-                                        label="🖼️ Download PNG (500 DPI)",
-                                        data=png_buf,
-                                        file_name="plasmid_map.png",
-                                        mime="image/png"
-                                    )
-                                
-                                plt.close(fig)
+                show_map_generator(df_display, plasmid_length, label_font, show_positions,
+                                   text_orientation, region_start, region_end,
+                                   png_dpi=png_dpi, key='generate_gb')
 
 # TAB 2: CSV/Excel Upload
 with tab2:
@@ -694,10 +752,7 @@ with tab2:
     
     if uploaded_file is not None:
         try:
-            if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(uploaded_file)
-            else:
-                df = pd.read_excel(uploaded_file)
+            df = parse_element_table(uploaded_file.getvalue(), uploaded_file.name)
             
             # Validate columns
             required_cols = ['Element', 'Start', 'End', 'Color', 'Position']
@@ -705,56 +760,26 @@ with tab2:
                 st.error(f"Missing required columns. Need: {', '.join(required_cols)}")
             else:
                 # Get plasmid length from data
+                max_end = int(df['End'].to_numpy().max())
                 plasmid_length = st.number_input("Plasmid Length (bp)", 
-                                                min_value=int(df['End'].max()), 
-                                                value=int(df['End'].max()) + 500)
+                                                min_value=max_end, 
+                                                value=max_end + 500)
                 
                 # Add IsPromoter column (default False for uploaded data)
                 df['IsPromoter'] = False
                 
+                # Normalize Position spelling (e.g. " up" -> "Up") once per category
+                # instead of per row
+                position_labels = df['Position'].cat.categories
+                df['Position'] = df['Position'].map(
+                    dict(zip(position_labels, position_labels.str.strip().str.capitalize()))
+                ).astype('category')
+                
                 st.subheader("📋 Data Preview")
                 st.dataframe(df)
                 
-                if st.button("🎨 Generate Plasmid Map", type="primary", key='generate_csv'):
-                    with st.spinner("Generating plasmid map..."):
-                        fig = create_plasmid_map(df, plasmid_length, label_font, 
-                                               show_positions, text_orientation)
-                        
-                        if fig:
-                            st.pyplot(fig)
-                            
-                            # Download options
-                            st.markdown("### 💾 Download Options")
-                            col1, col2, col3 = st.columns(3)
-                            
-                            with col1:
-                                pdf_buf = fig_to_bytes(fig, 'pdf', dpi=500)
-                                st.download_button(
-                                    label="📄 Download PDF",
-                                    data=pdf_buf,
-                                    file_name="plasmid_map.pdf",
-                                    mime="application/pdf"
-                                )
-                            
-                            with col2:
-                                svg_buf = fig_to_bytes(fig, 'svg', dpi=500)
-                                st.download_button(
-                                    label="🎨 Download SVG",
-                                    data=svg_buf,
-                                    file_name="plasmid_map.svg",
-                                    mime="image/svg+xml"
-                                )
-                            
-                            with col3:
-                                png_buf = fig_to_bytes(fig, 'png', dpi=500)
-                                st.download_button(
-                                    label="🖼️ Download PNG (500 DPI)",
-                                    data=png_buf,
-                                    file_name="plasmid_map.png",
-                                    mime="image/png"
-                                )
-                            
-                            plt.close(fig)
+                show_map_generator(df, plasmid_length, label_font, show_positions,
+                                   text_orientation, png_dpi=png_dpi, key='generate_csv')
         
         except Exception as e:
             st.error(f"Error reading file: {str(e)}")
@@ -766,7 +791,7 @@ with tab3:
     
     # Initialize manual data in session state
     if 'manual_data' not in st.session_state:
-        st.session_state.manual_data = []
+        st.session_state.manual_data = {column: [] for column in MANUAL_COLUMNS}
     
     # Input form
     with st.form("manual_entry_form"):
@@ -784,74 +809,34 @@ with tab3:
         submitted = st.form_submit_button("➕ Add Element")
         
         if submitted and element:
-            st.session_state.manual_data.append({
-                'Element': element,
-                'Start': start,
-                'End': end,
-                'Color': color,
-                'Position': position,
-                'IsPromoter': False
-            })
+            for column, value in zip(MANUAL_COLUMNS, (element, start, end, color, position, False)):
+                st.session_state.manual_data[column].append(value)
+            # Rebuild the table only when an element is added, not on every rerun
+            st.session_state.manual_df = pd.DataFrame(st.session_state.manual_data).astype(
+                {'Start': 'int32', 'End': 'int32', 'IsPromoter': 'bool'})
             st.success(f"Added: {element}")
     
     # Display current entries
-    if st.session_state.manual_data:
+    if st.session_state.manual_data['Element']:
         st.subheader("📋 Current Elements")
-        df_manual = pd.DataFrame(st.session_state.manual_data)
+        df_manual = st.session_state.manual_df
         st.dataframe(df_manual)
         
         # Clear button
         if st.button("🗑️ Clear All Elements"):
-            st.session_state.manual_data = []
+            st.session_state.manual_data = {column: [] for column in MANUAL_COLUMNS}
             st.rerun()
         
         # Plasmid length
+        max_end = int(max(st.session_state.manual_data['End']))
         plasmid_length = st.number_input("Plasmid Length (bp)", 
-                                        min_value=int(df_manual['End'].max()), 
-                                        value=int(df_manual['End'].max()) + 500,
+                                        min_value=max_end, 
+                                        value=max_end + 500,
                                         key='manual_length')
         
         # Generate button
-        if st.button("🎨 Generate Plasmid Map", type="primary", key='generate_manual'):
-            with st.spinner("Generating plasmid map..."):
-                fig = create_plasmid_map(df_manual, plasmid_length, label_font,
-                                       show_positions, text_orientation)
-                
-                if fig:
-                    st.pyplot(fig)
-                    
-                    # Download options
-                    st.markdown("### 💾 Download Options")
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        pdf_buf = fig_to_bytes(fig, 'pdf', dpi=500)
-                        st.download_button(
-                            label="📄 Download PDF",
-                            data=pdf_buf,
-                            file_name="plasmid_map.pdf",
-                            mime="application/pdf"
-                        )
-                    
-                    with col2:
-                        svg_buf = fig_to_bytes(fig, 'svg', dpi=500)
-                        st.download_button(
-                            label="🎨 Download SVG",
-                            data=svg_buf,
-                            file_name="plasmid_map.svg",
-                                mime="image/svg+xml"
-                        )
-                    
-                    with col3:
-                        png_buf = fig_to_bytes(fig, 'png', dpi=500)
-                        st.download_button(
-                            label="🖼️ Download PNG (500 DPI)",
-                            data=png_buf,
-                            file_name="plasmid_map.png",
-                            mime="image/png"
-                        )
-                    
-                    plt.close(fig)
+        show_map_generator(df_manual, plasmid_length, label_font, show_positions,
+                           text_orientation, png_dpi=png_dpi, key='generate_manual')
 
 # TAB 4: Help
 with tab4:
@@ -866,7 +851,7 @@ with tab4:
     ### Automatic Parsing
     - Extracts all features except 'source'
     - Feature names from: `/standard_name=` → `/label=` → `/gene=` → `/product=`
-    - **Promoters:** Regulatory features with "promoter" in `/note=` get arrow shapes
+    - **Promoters:** Regulatory features with "promoter" in `/note=`, `/regulatory_class=`, `/standard_name=` or `/label=` get arrow shapes
       - Forward strand (no complement) → Arrow points RIGHT →
       - Reverse strand (complement) → Arrow points LEFT ←
     - Random pastel colors assigned
@@ -889,7 +874,7 @@ with tab4:
     - **Text Orientation:** Horizontal (staggered to avoid overlap) or vertical
     - **Select/Deselect All:** Quickly show or hide all elements at once
     - **Staggered Labels:** Horizontal labels at different heights to prevent overlap
-    - **High Resolution:** 500 DPI output for publications
+    - **High Resolution:** PNG downloads at up to 500 DPI for publications, or Auto to cap the image at about 4 megapixels (set in the sidebar)
     
     ## CSV/Excel Input
     